@@ -0,0 +1,142 @@
+import base64
+import hashlib
+import hmac
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi import Header, HTTPException
+
+from .db import get_connection
+
+logger = logging.getLogger("skin_classifier")
+
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", str(8 * 3600)))
+USER_CACHE_TTL_SECONDS = int(os.getenv("USER_CACHE_TTL_SECONDS", "300"))
+USER_CACHE_MAX_ENTRIES = 1024
+
+_secret = os.getenv("SESSION_SECRET", "").encode("utf-8")
+if not _secret:
+    # Tokens then stop validating on restart and aren't shared between workers
+    logger.warning("SESSION_SECRET not set; using a random per-process secret")
+    _secret = os.urandom(32)
+
+
+def _b64encode(raw):
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _sign(payload):
+    return hmac.new(_secret, payload, hashlib.sha256).digest()
+
+
+def issue_token(user_id, now=None):
+    """Return a signed session token "<payload>.<signature>" for user_id."""
+    expires = int((now if now is not None else time.time()) + SESSION_TTL_SECONDS)
+    payload = f"{int(user_id)}:{expires}".encode("ascii")
+    return f"{_b64encode(payload)}.{_b64encode(_sign(payload))}"
+
+
+def verify_token(token, now=None):
+    """Return the user id carried by a valid, unexpired token, otherwise None."""
+    try:
+        payload_b64, signature_b64 = token.split(".", 1)
+        payload = _b64decode(payload_b64)
+        signature = _b64decode(signature_b64)
+    except (ValueError, AttributeError):
+        return None
+
+    if not hmac.compare_digest(signature, _sign(payload)):
+        return None
+
+    try:
+        user_id, expires = (int(part) for part in payload.decode("ascii").split(":"))
+    except ValueError:
+        return None
+
+    if expires < (now if now is not None else time.time()):
+        return None
+    return user_id
+
+
+class UserCache:
+    """Bounded, expiring map of user id -> user record (id, username)."""
+
+    def __init__(self, ttl_seconds, max_entries):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            user, expires = entry
+            if expires < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return user
+
+    def put(self, user):
+        with self._lock:
+            self._entries[user["id"]] = (user, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(user["id"])
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+
+user_cache = UserCache(USER_CACHE_TTL_SECONDS, USER_CACHE_MAX_ENTRIES)
+
+
+def _load_user(user_id):
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, nombre FROM usuario WHERE id = %s", (user_id,))
+        row = cursor.fetchone()
+        cursor.close()
+    finally:
+        conn.close()
+    if row is None:
+        return None
+    return {"id": row['id'], "username": row['nombre']}
+
+
+def get_current_user(authorization: str = Header(None)):
+    """
+    FastAPI dependency resolving "Authorization: Bearer <token>" to a user record.
+
+    The token is checked in memory; Postgres is only queried when the user
+    record has dropped out of the cache.
+    """
+    if not authorization or not authorization.lower().startswith("bearer "):
+        raise HTTPException(status_code=401, detail="Sesión requerida")
+
+    user_id = verify_token(authorization[7:].strip())
+    if user_id is None:
+        raise HTTPException(status_code=401, detail="Sesión inválida o expirada")
+
+    user = user_cache.get(user_id)
+    if user is None:
+        try:
+            user = _load_user(user_id)
+        except Exception as e:
+            logger.error(f"User lookup error: {str(e)}", exc_info=True)
+            raise HTTPException(status_code=503, detail="Base de datos no disponible")
+        if user is None:
+            raise HTTPException(status_code=401, detail="Usuario no encontrado")
+        user_cache.put(user)
+    return user
@@ -0,0 +1,64 @@
+# Disease name mapping
+DISEASE_NAMES = {
+    "MEL": "Melanoma",
+    "NV": "Nevus melanocítico",
+    "BCC": "Carcinoma basocelular",
+    "BKL": "Lesión tipo queratosis benigna"
+}
+
+MALIGNANT_CODES = frozenset({"MEL", "BCC"})
+
+# Built once from the `enfermedad` table; it only holds reference data
+_catalog = None
+
+def _display_name(code, detalle):
+    if not detalle:
+        return DISEASE_NAMES.get(code, code)
+    return detalle.split(' - ')[0]
+
+def get_disease_catalog(cursor, refresh=False):
+    """
+    Return the per-disease metadata, querying `enfermedad` on first use only
+    (or again when refresh is set).
+
+    The result is a dict with:
+        by_id: enfermedad.id -> {"enfermedad", "nombre", "status"}
+        id_by_code: disease code (MEL, NV, ...) -> enfermedad.id
+    """
+    global _catalog
+    if _catalog is None or refresh:
+        cursor.execute("SELECT id, enfermedad, detalle FROM enfermedad")
+        by_id = {}
+        id_by_code = {}
+        for row in cursor.fetchall():
+            code = row['enfermedad']
+            by_id[row['id']] = {
+                "enfermedad": code,
+                "nombre": _display_name(code, row['detalle']),
+                "status": "Maligno" if code in MALIGNANT_CODES else "Benigno"
+            }
+            id_by_code[code] = row['id']
+        _catalog = {"by_id": by_id, "id_by_code": id_by_code}
+    return _catalog
+
+def _unknown_disease(enfermedad_id):
+    return {"enfermedad": str(enfermedad_id), "nombre": "Desconocida", "status": "Desconocido"}
+
+def resolve_diseases(cursor, enfermedad_ids):
+    """
+    Map enfermedad ids to their metadata.
+
+    Ids missing from the cache (rows added after it was built) trigger a single
+    reload; anything still unknown gets a placeholder instead of failing.
+    """
+    by_id = get_disease_catalog(cursor)["by_id"]
+    if not by_id.keys() >= set(enfermedad_ids):
+        by_id = get_disease_catalog(cursor, refresh=True)["by_id"]
+    return {i: by_id.get(i) or _unknown_disease(i) for i in enfermedad_ids}
+
+def resolve_disease_ids(cursor, codes):
+    """Map disease codes to enfermedad ids, reloading the cache once for unknown codes."""
+    id_by_code = get_disease_catalog(cursor)["id_by_code"]
+    if not id_by_code.keys() >= set(codes):
+        id_by_code = get_disease_catalog(cursor, refresh=True)["id_by_code"]
+    return [id_by_code.get(code) for code in codes]
@@ -0,0 +1,204 @@
+"""
+Bulk export of historia_clinica with TOP 3 diseases, zones and users.
+
+Rows are streamed from a server-side (named) cursor and written incrementally,
+so memory stays constant regardless of the number of records. Used by the
+/api/export/history endpoint and runnable as a CLI:
+
+    python -m app.export --format csv --desde 2025-01-01 --hasta 2025-06-30 -o historia.csv
+"""
+import argparse
+import csv
+import io
+import os
+import sys
+from datetime import date, timedelta
+
+import orjson
+
+from .db import get_connection
+from .diseases import get_disease_catalog
+
+EXPORT_FORMATS = ("csv", "jsonl")
+# Users allowed to export every user's records (comma-separated usuario ids);
+# everyone else only gets the analyses they performed
+EXPORT_ADMIN_IDS = frozenset(
+    int(part) for part in os.getenv("EXPORT_ADMIN_IDS", "").split(",") if part.strip()
+)
+EXPORT_ITERSIZE = 2000
+# Rows per chunk handed to the HTTP response / output file
+EXPORT_CHUNK_ROWS = 500
+
+EXPORT_COLUMNS = [
+    "id", "fecha", "paciente_id", "paciente_ci", "paciente_nombre", "edad",
+    "zona_clinica",
+    "enfermedad_1", "probabilidad_1",
+    "enfermedad_2", "probabilidad_2",
+    "enfermedad_3", "probabilidad_3",
+    "id_usuario", "usuario",
+]
+
+# The range filter and the leading fecha ordering use idx_historia_fecha (or
+# idx_historia_usuario_fecha when filtering by user); hc.id only breaks ties, which
+# Postgres handles with an incremental sort over equal fechas, not a full sort
+_EXPORT_QUERY = """
+    SELECT
+        hc.id,
+        hc.fecha,
+        hc.paciente_id,
+        p.ci as paciente_ci,
+        p.nombre as paciente_nombre,
+        hc.edad,
+        zc.zona as zona_clinica,
+        hc.enfermedad_id_1,
+        hc.probabilidad_1::float8 as probabilidad_1,
+        hc.enfermedad_id_2,
+        hc.probabilidad_2::float8 as probabilidad_2,
+        hc.enfermedad_id_3,
+        hc.probabilidad_3::float8 as probabilidad_3,
+        hc.id_usuario,
+        u.nombre as usuario
+    FROM historia_clinica hc
+    LEFT JOIN paciente p ON hc.paciente_id = p.id
+    LEFT JOIN zona_clinica zc ON hc.zona_clinica_id = zc.id
+    LEFT JOIN usuario u ON hc.id_usuario = u.id
+    {where}
+    ORDER BY hc.fecha, hc.id
+"""
+
+def export_user_scope(user, requested_user_id, admin_ids=EXPORT_ADMIN_IDS):
+    """
+    Return the usuario id an export must be restricted to (None means all users).
+
+    Raises:
+        PermissionError: a non-admin asked for another user's records.
+    """
+    if user['id'] in admin_ids:
+        return requested_user_id
+    if requested_user_id is not None and requested_user_id != user['id']:
+        raise PermissionError("Solo puede exportar sus propios análisis")
+    return user['id']
+
+def _build_filters(desde=None, hasta=None, user_id=None):
+    clauses = []
+    params = []
+    if desde is not None:
+        clauses.append("hc.fecha >= %s")
+        params.append(desde)
+    if hasta is not None:
+        # `hasta` is inclusive: keep the whole day
+        clauses.append("hc.fecha < %s")
+        params.append(hasta + timedelta(days=1))
+    if user_id is not None:
+        clauses.append("hc.id_usuario = %s")
+        params.append(user_id)
+    where = ("WHERE " + " AND ".join(clauses)) if clauses else ""
+    return where, params
+
+def iter_history_rows(conn, desde=None, hasta=None, user_id=None, itersize=EXPORT_ITERSIZE):
+    """
+    Yield export rows (dicts keyed by EXPORT_COLUMNS) through a named cursor.
+
+    Postgres keeps the result set server-side and sends `itersize` rows per
+    round trip, instead of fetchall() materializing everything in memory.
+    """
+    # One small query per export, so diseases added since the cache was built are included
+    catalog_cursor = conn.cursor()
+    lookup = get_disease_catalog(catalog_cursor, refresh=True)["by_id"]
+    catalog_cursor.close()
+
+    def code(enfermedad_id):
+        disease = lookup.get(enfermedad_id)
+        return disease["enfermedad"] if disease else None
+
+    where, params = _build_filters(desde, hasta, user_id)
+    cursor = conn.cursor(name="historia_export")
+    cursor.itersize = itersize
+    try:
+        cursor.execute(_EXPORT_QUERY.format(where=where), params)
+        for r in cursor:
+            yield {
+                "id": r['id'],
+                "fecha": r['fecha'],
+                "paciente_id": r['paciente_id'],
+                "paciente_ci": r['paciente_ci'],
+                "paciente_nombre": r['paciente_nombre'],
+                "edad": r['edad'],
+                "zona_clinica": r['zona_clinica'],
+                "enfermedad_1": code(r['enfermedad_id_1']),
+                "probabilidad_1": r['probabilidad_1'],
+                "enfermedad_2": code(r['enfermedad_id_2']),
+                "probabilidad_2": r['probabilidad_2'],
+                "enfermedad_3": code(r['enfermedad_id_3']),
+                "probabilidad_3": r['probabilidad_3'],
+                "id_usuario": r['id_usuario'],
+                "usuario": r['usuario'],
+            }
+    finally:
+        cursor.close()
+
+def iter_csv_chunks(rows, chunk_rows=EXPORT_CHUNK_ROWS):
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    pending = 0
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= chunk_rows:
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate()
+            pending = 0
+    yield buf.getvalue().encode("utf-8")
+
+def iter_jsonl_chunks(rows, chunk_rows=EXPORT_CHUNK_ROWS):
+    lines = []
+    for row in rows:
+        lines.append(orjson.dumps(row) + b"\n")
+        if len(lines) >= chunk_rows:
+            yield b"".join(lines)
+            lines = []
+    if lines:
+        yield b"".join(lines)
+
+def stream_history_export(conn, fmt, desde=None, hasta=None, user_id=None):
+    """
+    Yield the encoded export in chunks, taking ownership of `conn`.
+
+    The caller opens the connection first, so connection errors surface before
+    any output is produced. It is closed when the generator is exhausted or
+    closed early (e.g. the HTTP client disconnects).
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+
+    try:
+        rows = iter_history_rows(conn, desde, hasta, user_id)
+        chunks = iter_csv_chunks(rows) if fmt == "csv" else iter_jsonl_chunks(rows)
+        yield from chunks
+    finally:
+        conn.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exportar historia_clinica con TOP 3 enfermedades")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv")
+    parser.add_argument("--desde", type=date.fromisoformat, help="Fecha inicial YYYY-MM-DD (inclusive)")
+    parser.add_argument("--hasta", type=date.fromisoformat, help="Fecha final YYYY-MM-DD (inclusive)")
+    parser.add_argument("--usuario-id", type=int, help="Solo análisis realizados por este usuario")
+    parser.add_argument("-o", "--output", help="Archivo de salida (por defecto stdout)")
+    args = parser.parse_args(argv)
+    if args.desde and args.hasta and args.desde > args.hasta:
+        parser.error("--desde debe ser anterior o igual a --hasta")
+
+    conn = get_connection()
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        for chunk in stream_history_export(conn, args.format, args.desde, args.hasta, args.usuario_id):
+            out.write(chunk)
+    finally:
+        if args.output:
+            out.close()
+
+if __name__ == "__main__":
+    main()
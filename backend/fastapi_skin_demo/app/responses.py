@@ -0,0 +1,16 @@
+import orjson
+from fastapi.responses import JSONResponse as _StarletteJSONResponse
+
+_ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+class JSONResponse(_StarletteJSONResponse):
+    """
+    Drop-in replacement for fastapi.responses.JSONResponse rendered with orjson.
+
+    NumPy arrays and scalars, datetimes and non-string dict keys are serialized
+    natively, so handlers can return model outputs without float() conversions.
+    """
+
+    def render(self, content):
+        return orjson.dumps(content, option=_ORJSON_OPTIONS)
@@ -0,0 +1,86 @@
+import threading
+import time
+from collections import OrderedDict, deque
+import numpy as np
+
+HASH_SIZE = 8
+DCT_SIZE = 32
+
+_GRAY_WEIGHTS = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+def _dct_matrix(n):
+    # Orthonormal DCT-II basis, so dct2(x) = D @ x @ D.T
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    d = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    d[0] /= np.sqrt(2.0)
+    return d.astype(np.float32)
+
+_DCT = _dct_matrix(DCT_SIZE)
+
+def phash(img_arr):
+    """
+    64-bit perceptual hash of an (H, W, 3) image array.
+
+    Meant for the array preprocess_image_bytes already returns, so no extra
+    decode is needed. The image is reduced to 32x32 grayscale by block
+    averaging, and each bit of the hash records whether one of the 8x8
+    lowest-frequency DCT coefficients is above their median.
+    """
+    gray = np.asarray(img_arr, dtype=np.float32) @ _GRAY_WEIGHTS
+    h, w = gray.shape
+    bh, bw = h // DCT_SIZE, w // DCT_SIZE
+    gray = gray[:bh * DCT_SIZE, :bw * DCT_SIZE]
+    small = gray.reshape(DCT_SIZE, bh, DCT_SIZE, bw).mean(axis=(1, 3))
+
+    low = (_DCT @ small @ _DCT.T)[:HASH_SIZE, :HASH_SIZE].ravel()
+    # The DC term only encodes mean brightness, leave it out of the median
+    bits = low > np.median(low[1:])
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count("1")
+
+class NearDuplicateIndex:
+    """
+    Recent image hashes per key (e.g. patient + metadata) with their results.
+
+    Memory is bounded by max_keys * per_key entries; keys are evicted least
+    recently used first and entries older than ttl_seconds are ignored. A
+    lookup is at most per_key XOR/popcounts, negligible next to inference.
+    """
+
+    def __init__(self, max_keys=1024, per_key=16, ttl_seconds=3600):
+        self.max_keys = max_keys
+        self.per_key = per_key
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def find(self, key, image_hash, max_distance):
+        """Return (result, distance) of the closest recent match within max_distance, or None."""
+        cutoff = time.monotonic() - self.ttl_seconds
+        with self._lock:
+            recent = self._entries.get(key)
+            if not recent:
+                return None
+            best = None
+            for stored_hash, stored_at, result in recent:
+                if stored_at < cutoff:
+                    continue
+                distance = hamming_distance(image_hash, stored_hash)
+                if distance <= max_distance and (best is None or distance < best[1]):
+                    best = (result, distance)
+            if best is not None:
+                self._entries.move_to_end(key)
+            return best
+
+    def add(self, key, image_hash, result):
+        with self._lock:
+            recent = self._entries.get(key)
+            if recent is None:
+                recent = self._entries[key] = deque(maxlen=self.per_key)
+            recent.append((image_hash, time.monotonic(), result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
@@ -1,14 +1,81 @@
-
 import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 from PIL import Image
-import tensorflow as tf
+
+# Refuse images whose decoded size would dwarf the upload (decompression bombs)
+MAX_IMAGE_PIXELS = 40_000_000
+
+DECODE_WORKERS = int(os.getenv("DECODE_WORKERS", str(min(8, os.cpu_count() or 1))))
+
+# Shared by every batch; created on first use so single-image processes never start threads
+_decode_pool = None
+_decode_pool_lock = threading.Lock()
+
+SEX_ALIASES = {
+    "f": "female", "female": "female", "mujer": "female",
+    "m": "male", "male": "male", "hombre": "male",
+}
+
+def efficientnet_preprocess_input(x):
+    """
+    NumPy equivalent of tf.keras.applications.efficientnet.preprocess_input.
+
+    Keras EfficientNet models embed their own rescaling and normalization layers,
+    so the TF function is a pass-through that expects raw [0, 255] pixels; this
+    only guarantees a float32 array without importing TensorFlow.
+    """
+    return np.asarray(x, dtype=np.float32)
+
+class ImageTooLarge(ValueError):
+    pass
+
+def _decode_rgb(contents, img_size):
+    # Accepts raw bytes or a binary file object (e.g. the upload buffer) without copying it
+    source = contents if hasattr(contents, "read") else io.BytesIO(contents)
+    img = Image.open(source)
+    if img.size[0] * img.size[1] > MAX_IMAGE_PIXELS:
+        raise ImageTooLarge(f"Image too large: {img.size[0]}x{img.size[1]} pixels")
+    img = img.convert("RGB")
+    return img.resize((img_size[0], img_size[1]), Image.BILINEAR)
 
 def preprocess_image_bytes(contents, img_size=(224,224)):
-    img = Image.open(io.BytesIO(contents)).convert("RGB")
-    img = img.resize((img_size[0], img_size[1]), Image.BILINEAR)
+    img = _decode_rgb(contents, img_size)
     arr = np.array(img).astype("float32")
-    return tf.keras.applications.efficientnet.preprocess_input(arr)
+    return efficientnet_preprocess_input(arr)
+
+def _get_decode_pool():
+    global _decode_pool
+    if _decode_pool is None:
+        with _decode_pool_lock:
+            if _decode_pool is None:
+                _decode_pool = ThreadPoolExecutor(max_workers=DECODE_WORKERS, thread_name_prefix="decode")
+    return _decode_pool
+
+def preprocess_images_batch(contents_list, img_size=(224,224)):
+    """
+    Decode N images into a single (N, H, W, 3) float32 batch.
+
+    Decoding runs in a shared thread pool of DECODE_WORKERS threads (PIL
+    releases the GIL while decoding and resizing) and every worker writes
+    straight into one preallocated uint8 buffer; the float conversion and
+    EfficientNet normalization then happen once over the whole batch.
+    """
+    n = len(contents_list)
+    out = np.empty((n, img_size[1], img_size[0], 3), dtype=np.uint8)
+
+    def _fill(i):
+        out[i] = np.asarray(_decode_rgb(contents_list[i], img_size))
+
+    if n == 1:
+        _fill(0)
+    elif n > 1:
+        # list() re-raises the first decoding error
+        list(_get_decode_pool().map(_fill, range(n)))
+
+    return efficientnet_preprocess_input(out.astype(np.float32))
 
 def encode_metadata(age_input, sex_input, site_input, artifacts):
     sex2idx = artifacts.get("sex2idx", {"male":0,"female":1,"unknown":2})
@@ -23,10 +90,7 @@ def encode_metadata(age_input, sex_input, site_input, artifacts):
     age_norm = (age - age_mean) / (age_std if age_std!=0 else 1)
 
     s = str(sex_input).lower()
-    if s in ["f","female","mujer"]:
-        s="female"
-    elif s in ["m","male","hombre"]:
-        s="male"
+    s = SEX_ALIASES.get(s, s)
     sex_idx = sex2idx.get(s, sex2idx.get("unknown",0))
     sex_ohe = [0.0]*len(sex2idx)
     sex_ohe[int(sex_idx)] = 1.0
@@ -35,3 +99,63 @@ def encode_metadata(age_input, sex_input, site_input, artifacts):
     site_idx = site2idx.get(site_str, site2idx.get("other",0))
 
     return age_norm, sex_ohe, int(site_idx)
+
+def compile_metadata_tables(artifacts):
+    """
+    Build the lookup tables used by encode_metadata_batch.
+
+    Call once per artifacts load; the result is reused for every batch.
+    """
+    sex2idx = artifacts.get("sex2idx", {"male":0,"female":1,"unknown":2})
+    site2idx = artifacts.get("site2idx", {"other":0})
+    age_std = float(artifacts.get("age_std",16))
+
+    # Raw form values (and their aliases) resolve to an index with a single dict hit
+    sex_lookup = {k: int(v) for k, v in sex2idx.items()}
+    for alias, canonical in SEX_ALIASES.items():
+        if canonical in sex2idx:
+            sex_lookup[alias] = int(sex2idx[canonical])
+
+    return {
+        "age_mean": float(artifacts.get("age_mean",60)),
+        "age_std": age_std if age_std != 0 else 1.0,
+        "sex_lookup": sex_lookup,
+        "sex_default": int(sex2idx.get("unknown",0)),
+        "sex_eye": np.eye(len(sex2idx), dtype=np.float32),
+        "site_lookup": {k: int(v) for k, v in site2idx.items()},
+        "site_default": int(site2idx.get("other",0)),
+    }
+
+def encode_metadata_batch(ages, sexes, sites, tables):
+    """
+    Vectorized counterpart of encode_metadata for N records.
+
+    Returns (age_norm (N,) float32, sex_ohe (N, n_sex) float32, site_idx (N,) int32),
+    matching the model's "age", "sex_ohe" and "site_idx" inputs.
+    """
+    age_mean = tables["age_mean"]
+
+    ages_f = np.empty(len(ages), dtype=np.float32)
+    for i, a in enumerate(ages):
+        try:
+            ages_f[i] = float(a)
+        except (TypeError, ValueError):
+            ages_f[i] = age_mean
+    age_norm = (ages_f - np.float32(age_mean)) / np.float32(tables["age_std"])
+
+    sex_lookup = tables["sex_lookup"]
+    sex_default = tables["sex_default"]
+    sex_idx = np.fromiter(
+        (sex_lookup.get(str(s).lower(), sex_default) for s in sexes),
+        dtype=np.intp, count=len(sexes),
+    )
+    sex_ohe = tables["sex_eye"][sex_idx]
+
+    site_lookup = tables["site_lookup"]
+    site_default = tables["site_default"]
+    site_idx = np.fromiter(
+        (site_lookup.get(str(s), site_default) for s in sites),
+        dtype=np.int32, count=len(sites),
+    )
+
+    return age_norm, sex_ohe, site_idx
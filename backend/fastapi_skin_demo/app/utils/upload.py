@@ -0,0 +1,144 @@
+import hashlib
+import io
+import json
+
+# Magic numbers of the image formats the model pipeline accepts
+IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+)
+
+SNIFF_BYTES = 16
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+class UploadRejected(ValueError):
+    """Upload refused before decoding; carries the HTTP status to answer with."""
+
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class IngestedImage:
+    """Raw image bytes plus what was learned while reading them."""
+
+    __slots__ = ("data", "format", "sha256", "size")
+
+    def __init__(self, data, fmt, sha256, size):
+        self.data = data
+        self.format = fmt
+        self.sha256 = sha256
+        self.size = size
+
+
+class ContentLengthLimitMiddleware:
+    """
+    Pure ASGI middleware answering 413 for requests to `path` whose
+    Content-Length exceeds `max_bytes`, before the body is received.
+
+    Every other request is passed through untouched. Chunked requests without
+    Content-Length are still caught later by read_image_upload.
+    """
+
+    def __init__(self, app, path, max_bytes, detail):
+        self.app = app
+        self.path = path
+        self.max_bytes = max_bytes
+        self._body = json.dumps({"detail": detail}).encode("utf-8")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] == self.path:
+            for name, value in scope["headers"]:
+                if name == b"content-length":
+                    if value.isdigit() and int(value) > self.max_bytes:
+                        await send({
+                            "type": "http.response.start",
+                            "status": 413,
+                            "headers": [
+                                (b"content-type", b"application/json"),
+                                (b"content-length", str(len(self._body)).encode("ascii")),
+                            ],
+                        })
+                        await send({"type": "http.response.body", "body": self._body})
+                        return
+                    break
+        await self.app(scope, receive, send)
+
+
+def sniff_image_format(head):
+    for signature, fmt in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return fmt
+    return None
+
+
+def _too_large(max_bytes):
+    return UploadRejected(
+        f"El archivo excede el tamaño máximo permitido ({max_bytes} bytes)", 413
+    )
+
+
+def _buffer_for(declared_size):
+    buf = io.BytesIO()
+    if declared_size:
+        # Allocate the whole buffer once; later writes overwrite it in place
+        buf.seek(declared_size - 1)
+        buf.write(b"\0")
+        buf.seek(0)
+    return buf
+
+
+async def read_image_upload(file, max_bytes, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Read an UploadFile in chunks, enforcing a size cap and a format whitelist.
+
+    The format is sniffed from the first bytes so unsupported files are rejected
+    before the rest is read, and the SHA-256 digest is computed as the chunks
+    arrive. Chunks are written into a single BytesIO, preallocated from
+    ``file.size`` when it is known, which is returned rewound as ``data`` and
+    can be handed to the decoder as is. Peak memory is therefore about
+    ``max_bytes + chunk_size`` per request.
+
+    Starlette has already spooled the multipart body (to disk past 1 MB) before
+    the handler runs, so this bounds the in-process copy only; oversized
+    requests are refused earlier from their Content-Length header.
+
+    Raises:
+        UploadRejected: 413 if the body exceeds ``max_bytes``, 415 if the format
+            is not supported, 400 if the body is empty.
+    """
+    declared_size = getattr(file, "size", None)
+    if declared_size is not None and declared_size > max_bytes:
+        raise _too_large(max_bytes)
+
+    digest = hashlib.sha256()
+    buf = _buffer_for(declared_size)
+    total = 0
+    fmt = None
+
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            break
+
+        if fmt is None:
+            # The first chunk is always >= SNIFF_BYTES unless the whole file is smaller
+            fmt = sniff_image_format(chunk[:SNIFF_BYTES])
+            if fmt is None:
+                raise UploadRejected("Formato de imagen no soportado (use JPEG o PNG)", 415)
+
+        total += len(chunk)
+        if total > max_bytes:
+            raise _too_large(max_bytes)
+
+        digest.update(chunk)
+        buf.write(chunk)
+
+    if total == 0:
+        raise UploadRejected("El archivo está vacío", 400)
+
+    # Drop the unused tail if the declared size overestimated the body
+    buf.truncate(total)
+    buf.seek(0)
+    return IngestedImage(buf, fmt, digest.hexdigest(), total)
@@ -0,0 +1,51 @@
+import pytest
+
+pytest.importorskip("fastapi")
+
+from app.auth import UserCache, issue_token, verify_token, SESSION_TTL_SECONDS
+
+
+def test_token_round_trip():
+    assert verify_token(issue_token(42)) == 42
+
+
+def test_tampered_token_is_rejected():
+    payload, signature = issue_token(42).split(".")
+    forged = issue_token(1).split(".")[0]
+    assert verify_token(f"{forged}.{signature}") is None
+    assert verify_token(f"{payload}.") is None
+    assert verify_token("not-a-token") is None
+
+
+def test_expired_token_is_rejected():
+    token = issue_token(7, now=1000)
+    assert verify_token(token, now=1000 + SESSION_TTL_SECONDS - 1) == 7
+    assert verify_token(token, now=1000 + SESSION_TTL_SECONDS + 1) is None
+
+
+def test_user_cache_evicts_oldest_and_expires():
+    cache = UserCache(ttl_seconds=60, max_entries=2)
+    for i in range(3):
+        cache.put({"id": i, "username": f"u{i}"})
+    assert cache.get(0) is None
+    assert cache.get(2) == {"id": 2, "username": "u2"}
+
+    expired = UserCache(ttl_seconds=-1, max_entries=2)
+    expired.put({"id": 1, "username": "u1"})
+    assert expired.get(1) is None
+
+
+def test_database_failure_on_cache_miss_is_a_503(monkeypatch):
+    from fastapi import HTTPException
+
+    from app import auth
+
+    def unavailable(user_id):
+        raise ConnectionError("could not connect to server")
+
+    monkeypatch.setattr(auth, "_load_user", unavailable)
+    auth.user_cache.discard(99)
+
+    with pytest.raises(HTTPException) as exc:
+        auth.get_current_user(f"Bearer {issue_token(99)}")
+    assert exc.value.status_code == 503
@@ -0,0 +1,49 @@
+import pytest
+
+from app import diseases
+
+
+class FakeCursor:
+    """Answers the catalog query from a mutable list of enfermedad rows."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = 0
+
+    def execute(self, query, params=None):
+        self.queries += 1
+
+    def fetchall(self):
+        return list(self.rows)
+
+
+@pytest.fixture(autouse=True)
+def empty_catalog(monkeypatch):
+    monkeypatch.setattr(diseases, "_catalog", None)
+
+
+def test_catalog_is_built_once_with_display_name_and_status():
+    cursor = FakeCursor([{"id": 4, "enfermedad": "MEL", "detalle": "Melanoma - Tipo más grave"}])
+
+    resolved = diseases.resolve_diseases(cursor, {4})
+    diseases.resolve_diseases(cursor, {4})
+
+    assert resolved[4] == {"enfermedad": "MEL", "nombre": "Melanoma", "status": "Maligno"}
+    assert cursor.queries == 1
+
+
+def test_rows_added_after_first_load_trigger_one_reload():
+    cursor = FakeCursor([{"id": 1, "enfermedad": "NV", "detalle": None}])
+    diseases.resolve_diseases(cursor, {1})
+    cursor.rows.append({"id": 5, "enfermedad": "SCC", "detalle": "Carcinoma escamoso - Nuevo"})
+
+    assert diseases.resolve_diseases(cursor, {1, 5})[5]["enfermedad"] == "SCC"
+    assert diseases.resolve_disease_ids(cursor, ["SCC", "NV"]) == [5, 1]
+    assert cursor.queries == 2
+
+
+def test_unknown_ids_and_codes_do_not_fail():
+    cursor = FakeCursor([{"id": 1, "enfermedad": "NV", "detalle": None}])
+
+    assert diseases.resolve_diseases(cursor, {9})[9]["status"] == "Desconocido"
+    assert diseases.resolve_disease_ids(cursor, ["XYZ"]) == [None]
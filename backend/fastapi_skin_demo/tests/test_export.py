@@ -0,0 +1,126 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+
+from app.export import EXPORT_COLUMNS, _build_filters, iter_csv_chunks, iter_jsonl_chunks
+
+
+def _rows(n):
+    for i in range(n):
+        row = dict.fromkeys(EXPORT_COLUMNS)
+        row.update(id=i, fecha=datetime(2025, 1, 1, 10, 30), enfermedad_1="MEL", probabilidad_1=87.5)
+        yield row
+
+
+def test_csv_export_is_chunked_with_a_single_header():
+    chunks = list(iter_csv_chunks(_rows(5), chunk_rows=2))
+
+    assert len(chunks) == 3
+    records = list(csv.DictReader(io.StringIO(b"".join(chunks).decode("utf-8"))))
+    assert [r["id"] for r in records] == ["0", "1", "2", "3", "4"]
+    assert records[0]["enfermedad_1"] == "MEL"
+
+
+def test_jsonl_export_writes_one_object_per_line():
+    data = b"".join(iter_jsonl_chunks(_rows(3), chunk_rows=2)).decode("utf-8")
+
+    records = [json.loads(line) for line in data.splitlines()]
+    assert [r["id"] for r in records] == [0, 1, 2]
+    assert records[0]["fecha"].startswith("2025-01-01T10:30")
+
+
+def test_date_range_is_inclusive_of_the_last_day():
+    where, params = _build_filters(date(2025, 1, 1), date(2025, 1, 31), 3)
+
+    assert where == "WHERE hc.fecha >= %s AND hc.fecha < %s AND hc.id_usuario = %s"
+    assert params == [date(2025, 1, 1), date(2025, 2, 1), 3]
+    assert _build_filters() == ("", [])
+
+
+class FakeConnection:
+    def __init__(self, rows, enfermedades=({"id": 1, "enfermedad": "MEL", "detalle": "Melanoma - grave"},)):
+        self.rows = rows
+        self.enfermedades = list(enfermedades)
+        self.closed = False
+
+    def cursor(self, name=None):
+        conn = self
+
+        class Cursor:
+            itersize = None
+
+            def execute(self, query, params=None):
+                pass
+
+            def fetchall(self):
+                return conn.enfermedades
+
+            def __iter__(self):
+                return iter(conn.rows)
+
+            def close(self):
+                pass
+
+        return Cursor()
+
+    def close(self):
+        self.closed = True
+
+
+def _db_row(**values):
+    row = dict.fromkeys(
+        ["id", "fecha", "paciente_id", "paciente_ci", "paciente_nombre", "edad", "zona_clinica",
+         "enfermedad_id_1", "probabilidad_1", "enfermedad_id_2", "probabilidad_2",
+         "enfermedad_id_3", "probabilidad_3", "id_usuario", "usuario"]
+    )
+    row.update(values)
+    return row
+
+
+def test_export_stream_closes_the_connection_it_is_given(monkeypatch):
+    from app import diseases
+    from app.export import stream_history_export
+
+    monkeypatch.setattr(diseases, "_catalog", None)
+    conn = FakeConnection([_db_row(id=7, enfermedad_id_1=1)])
+
+    data = b"".join(stream_history_export(conn, "jsonl"))
+
+    assert json.loads(data)["enfermedad_1"] == "MEL"
+    assert conn.closed
+
+
+def test_export_includes_diseases_added_after_the_catalog_was_cached(monkeypatch):
+    from app import diseases
+    from app.export import stream_history_export
+
+    monkeypatch.setattr(diseases, "_catalog", None)
+    diseases.get_disease_catalog(FakeConnection([]).cursor())
+    conn = FakeConnection(
+        [_db_row(id=8, enfermedad_id_1=1, enfermedad_id_2=5)],
+        enfermedades=[
+            {"id": 1, "enfermedad": "MEL", "detalle": "Melanoma - grave"},
+            {"id": 5, "enfermedad": "SCC", "detalle": "Carcinoma escamoso - nuevo"},
+        ],
+    )
+
+    record = json.loads(b"".join(stream_history_export(conn, "jsonl")))
+
+    assert record["enfermedad_1"] == "MEL"
+    assert record["enfermedad_2"] == "SCC"
+
+
+def test_export_is_limited_to_the_callers_records_unless_admin():
+    import pytest
+
+    from app.export import export_user_scope
+
+    user = {"id": 2, "username": "carlos"}
+    assert export_user_scope(user, None, admin_ids=frozenset()) == 2
+    assert export_user_scope(user, 2, admin_ids=frozenset()) == 2
+    with pytest.raises(PermissionError):
+        export_user_scope(user, 3, admin_ids=frozenset())
+
+    assert export_user_scope(user, None, admin_ids=frozenset({2})) is None
+    assert export_user_scope(user, 3, admin_ids=frozenset({2})) == 3
@@ -0,0 +1,57 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.utils.phash import NearDuplicateIndex, hamming_distance, phash
+
+
+def _image(seed):
+    # Smooth random image: low-frequency content, like a photographed lesion
+    rng = np.random.default_rng(seed)
+    coarse = rng.uniform(0, 255, size=(8, 8, 3)).astype(np.float32)
+    return np.kron(coarse, np.ones((28, 28, 1), dtype=np.float32))
+
+
+def test_near_duplicates_are_close_and_distinct_images_are_far():
+    base = _image(0)
+    brighter = np.clip(base * 1.1 + 5, 0, 255)
+    noisy = np.clip(base + np.random.default_rng(1).normal(0, 4, base.shape), 0, 255)
+
+    h = phash(base)
+    assert hamming_distance(h, phash(base)) == 0
+    assert hamming_distance(h, phash(brighter)) <= 4
+    assert hamming_distance(h, phash(noisy)) <= 6
+    assert hamming_distance(h, phash(_image(2))) > 16
+
+
+def test_crops_are_not_near_duplicates():
+    # Known limitation: the DCT hash shifts with framing, so a 5% crop per side
+    # lands further away than noise or lighting changes do
+    base = _image(0)
+    margin = 224 * 5 // 100
+    rows = margin + np.arange(224) * (224 - 2 * margin) // 224
+    cropped = base[np.ix_(rows, rows)]
+
+    assert hamming_distance(phash(base), phash(cropped)) > 6
+
+
+def test_index_returns_closest_match_within_threshold():
+    index = NearDuplicateIndex(max_keys=2, per_key=2, ttl_seconds=60)
+    index.add("a", 0b1111, "far")
+    index.add("a", 0b0001, "near")
+
+    assert index.find("a", 0b0000, max_distance=2) == ("near", 1)
+    assert index.find("a", 0b0000, max_distance=0) is None
+    assert index.find("b", 0b0001, max_distance=2) is None
+
+
+def test_index_is_bounded():
+    index = NearDuplicateIndex(max_keys=2, per_key=2, ttl_seconds=60)
+    for i in range(3):
+        index.add("a", i, i)
+    assert index.find("a", 0, max_distance=0) is None
+
+    index.add("b", 0, "b")
+    index.add("c", 0, "c")
+    assert index.find("a", 2, max_distance=0) is None
+    assert index.find("c", 0, max_distance=0) == ("c", 0)
@@ -0,0 +1,101 @@
+import io
+import os
+import subprocess
+import sys
+
+import pytest
+
+np = pytest.importorskip("numpy")
+Image = pytest.importorskip("PIL.Image")
+
+from app.utils.preprocessing import (
+    efficientnet_preprocess_input,
+    preprocess_image_bytes,
+    preprocess_images_batch,
+)
+
+# backend/fastapi_skin_demo, so tests don't depend on the working directory
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _png_bytes(seed, size=(300, 200)):
+    rng = np.random.default_rng(seed)
+    arr = rng.integers(0, 256, size=(size[1], size[0], 3), dtype=np.uint8)
+    buf = io.BytesIO()
+    Image.fromarray(arr).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def test_preprocessing_does_not_import_tensorflow():
+    # Fresh interpreter so modules imported by other tests don't leak in
+    code = (
+        "import sys, app.utils.preprocessing, app.db; "
+        "assert 'tensorflow' not in sys.modules; "
+        "assert 'psycopg2' not in sys.modules"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=APP_ROOT, check=True)
+
+
+def test_efficientnet_preprocess_matches_tensorflow():
+    tf = pytest.importorskip("tensorflow")
+    rng = np.random.default_rng(0)
+    x = rng.uniform(0, 255, size=(2, 224, 224, 3)).astype(np.float32)
+
+    expected = tf.keras.applications.efficientnet.preprocess_input(x.copy())
+
+    result = efficientnet_preprocess_input(x)
+    assert result.dtype == np.float32
+    np.testing.assert_array_equal(result, np.asarray(expected))
+
+
+def test_batch_matches_single_image_path():
+    contents = [_png_bytes(i) for i in range(3)]
+
+    batch = preprocess_images_batch(contents, (224, 224))
+
+    assert batch.shape == (3, 224, 224, 3)
+    assert batch.dtype == np.float32
+    for i, c in enumerate(contents):
+        np.testing.assert_array_equal(batch[i], preprocess_image_bytes(c, (224, 224)))
+
+
+def test_jpeg_is_fully_decoded_before_resizing():
+    rng = np.random.default_rng(3)
+    buf = io.BytesIO()
+    Image.fromarray(rng.integers(0, 256, size=(1800, 2400, 3), dtype=np.uint8)).save(buf, format="JPEG")
+    contents = buf.getvalue()
+
+    expected = np.asarray(
+        Image.open(io.BytesIO(contents)).convert("RGB").resize((224, 224), Image.BILINEAR),
+        dtype=np.float32,
+    )
+
+    np.testing.assert_array_equal(preprocess_image_bytes(contents, (224, 224)), expected)
+    np.testing.assert_array_equal(preprocess_image_bytes(io.BytesIO(contents), (224, 224)), expected)
+
+
+def test_metadata_batch_matches_single_record_encoding():
+    import json
+
+    from app.utils.preprocessing import compile_metadata_tables, encode_metadata, encode_metadata_batch
+
+    with open(os.path.join(APP_ROOT, "model", "preprocess_artifacts.json"), encoding="utf-8") as f:
+        artifacts = json.load(f)
+    records = [
+        (45, "male", "head/neck"),
+        ("60", "M", "palms/soles"),
+        (30.5, "mujer", "upper extremity"),
+        (None, "hombre", "nowhere"),
+        ("n/a", "X", None),
+        (70, None, "anterior torso"),
+    ]
+
+    ages, sexes, sites = encode_metadata_batch(
+        *zip(*records), compile_metadata_tables(artifacts)
+    )
+
+    for i, (age, sex, site) in enumerate(records):
+        age_norm, sex_ohe, site_idx = encode_metadata(age, sex, site, artifacts)
+        assert ages[i] == pytest.approx(age_norm, abs=1e-5)
+        np.testing.assert_array_equal(sexes[i], sex_ohe)
+        assert sites[i] == site_idx
@@ -0,0 +1,115 @@
+import asyncio
+import hashlib
+
+import pytest
+
+from app.utils.upload import UploadRejected, read_image_upload
+
+PNG = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 40
+JPEG = b"\xff\xd8\xff\xe0" + b"\x01" * 5000
+
+
+class FakeUpload:
+    """Minimal stand-in for starlette's UploadFile."""
+
+    def __init__(self, data, size=None):
+        self._data = data
+        self._pos = 0
+        self.size = size
+        self.filename = "lesion"
+
+    async def read(self, n=-1):
+        end = len(self._data) if n < 0 else self._pos + n
+        chunk = self._data[self._pos:end]
+        self._pos += len(chunk)
+        return chunk
+
+
+def _read(upload, max_bytes=1_000_000, chunk_size=1024):
+    return asyncio.run(read_image_upload(upload, max_bytes, chunk_size=chunk_size))
+
+
+@pytest.mark.parametrize("data, fmt", [(PNG, "png"), (JPEG, "jpeg")])
+@pytest.mark.parametrize("declared", [True, False])
+def test_reads_whole_body_and_hashes_it(data, fmt, declared):
+    image = _read(FakeUpload(data, size=len(data) if declared else None))
+
+    assert image.format == fmt
+    assert image.size == len(data)
+    assert image.sha256 == hashlib.sha256(data).hexdigest()
+    assert image.data.read() == data
+
+
+def test_overestimated_declared_size_is_trimmed():
+    image = _read(FakeUpload(PNG, size=len(PNG) + 500))
+
+    assert image.data.read() == PNG
+
+
+def test_unsupported_format_is_rejected_from_first_bytes():
+    upload = FakeUpload(b"GIF89a" + b"\x00" * 5000)
+
+    with pytest.raises(UploadRejected) as exc:
+        _read(upload)
+    assert exc.value.status_code == 415
+    assert upload._pos == 1024
+
+
+def test_declared_size_over_cap_is_rejected_before_reading():
+    upload = FakeUpload(PNG, size=len(PNG))
+
+    with pytest.raises(UploadRejected) as exc:
+        _read(upload, max_bytes=len(PNG) - 1)
+    assert exc.value.status_code == 413
+    assert upload._pos == 0
+
+
+def test_streamed_size_over_cap_is_rejected():
+    with pytest.raises(UploadRejected) as exc:
+        _read(FakeUpload(PNG), max_bytes=len(PNG) - 1)
+    assert exc.value.status_code == 413
+
+
+def test_empty_body_is_rejected():
+    with pytest.raises(UploadRejected) as exc:
+        _read(FakeUpload(b""))
+    assert exc.value.status_code == 400
+
+
+def _call_middleware(path, headers):
+    from app.utils.upload import ContentLengthLimitMiddleware
+
+    calls = []
+
+    async def inner(scope, receive, send):
+        calls.append(scope["path"])
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    middleware = ContentLengthLimitMiddleware(inner, path="/predict", max_bytes=100, detail="too big")
+    scope = {"type": "http", "path": path, "headers": headers}
+    asyncio.run(middleware(scope, None, send))
+    return calls, sent
+
+
+def test_middleware_rejects_oversized_predict_from_header():
+    calls, sent = _call_middleware("/predict", [(b"content-length", b"101")])
+
+    assert calls == []
+    assert sent[0]["status"] == 413
+    assert sent[1]["body"] == b'{"detail": "too big"}'
+
+
+@pytest.mark.parametrize("path, headers", [
+    ("/predict", [(b"content-length", b"100")]),
+    ("/predict", []),
+    ("/api/export/history", [(b"content-length", b"5000")]),
+])
+def test_middleware_passes_other_requests_through(path, headers):
+    calls, sent = _call_middleware(path, headers)
+
+    assert calls == [path]
+    assert sent == []
@@ -11,9 +11,10 @@ const Layout = () => {
   useEffect(() => {
     const isAuthenticated = localStorage.getItem('isAuthenticated')
     const username = localStorage.getItem('username')
+    const sessionToken = localStorage.getItem('sessionToken')
     
-    // Si no está autenticado O no tiene username válido, redirigir al login
-    if (!isAuthenticated || isAuthenticated !== 'true' || !username || username === 'Usuario') {
+    // Sin sesión válida (incluye sesiones anteriores sin token), redirigir al login
+    if (!isAuthenticated || isAuthenticated !== 'true' || !username || username === 'Usuario' || !sessionToken) {
       // Limpiar localStorage corrupto
       localStorage.clear()
       navigate('/login', { replace: true })
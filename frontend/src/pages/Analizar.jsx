@@ -1,6 +1,7 @@
 import { useState, useMemo, useCallback, memo } from 'react'
 import { useTheme } from '../contexts/ThemeContext'
 import HistorySection from '../components/dashboard/HistorySection'
+import { authFetch, SESSION_EXPIRED } from '../utils/session'
 
 // Constants moved outside component to prevent recreation
 const SEX_OPTIONS = [
@@ -709,6 +710,7 @@ const Analizar = () => {
   const [analyzing, setAnalyzing] = useState(false)
   const [historyData, setHistoryData] = useState(mockHistory)
   const [latestAnalysisId, setLatestAnalysisId] = useState(null)
+  const [reusedResult, setReusedResult] = useState(false)
 
   const steps = useMemo(() => [
     { label: 'Datos del Paciente' },
@@ -741,7 +743,7 @@ const Analizar = () => {
     
     // Buscar historial del paciente por CI
     try {
-      const response = await fetch(`/api/patient-history/${formData.ci}`)
+      const response = await authFetch(`/api/patient-history/${formData.ci}`)
       if (response.ok) {
         const data = await response.json()
         console.log('Patient history:', data)
@@ -794,6 +796,7 @@ const Analizar = () => {
       telefono: '',
     })
     setPreview(null)
+    setReusedResult(false)
     setCurrentStep(0)
     window.scrollTo({ top: 0, behavior: 'smooth' })
   }, [])
@@ -817,6 +820,7 @@ const Analizar = () => {
       formDataToSend.append('age', formData.age)
       formDataToSend.append('sex', formData.sex.toLowerCase())
       formDataToSend.append('site', formData.anatom_site_general)
+      formDataToSend.append('patient_ci', formData.ci)
       
       // Llamar al backend para obtener la predicción
       const response = await fetch('/predict', {
@@ -831,69 +835,64 @@ const Analizar = () => {
       
       const predictionData = await response.json()
       console.log('Prediction result:', predictionData)
+      setReusedResult(Boolean(predictionData.duplicate_of_recent))
       
-      // Obtener el ID del usuario desde localStorage
-      const userId = localStorage.getItem('userId')
+      // Guardar el análisis en la base de datos con TOP 3 (authFetch redirige al login si la sesión expiró)
+      const saveFormData = new FormData()
+      saveFormData.append('paciente_nombre', formData.nombre)
+      saveFormData.append('paciente_edad', formData.age)
+      saveFormData.append('paciente_sexo', formData.sex)
+      saveFormData.append('paciente_ci', formData.ci)
+      saveFormData.append('paciente_complemento', formData.complemento || '')
+      saveFormData.append('paciente_telefono', formData.telefono || '')
+      saveFormData.append('zona_clinica', formData.anatom_site_general)
       
-      // Guardar el análisis en la base de datos con TOP 3
-      if (userId) {
-        const saveFormData = new FormData()
-        saveFormData.append('paciente_nombre', formData.nombre)
-        saveFormData.append('paciente_edad', formData.age)
-        saveFormData.append('paciente_sexo', formData.sex)
-        saveFormData.append('paciente_ci', formData.ci)
-        saveFormData.append('paciente_complemento', formData.complemento || '')
-        saveFormData.append('paciente_telefono', formData.telefono || '')
-        saveFormData.append('zona_clinica', formData.anatom_site_general)
-        
-        // Enviar TOP 3 enfermedades con probabilidades (ya como porcentajes 0-100)
-        saveFormData.append('enfermedad_codigo_1', predictionData.top_predictions[0].disease)
-        saveFormData.append('probabilidad_1', (predictionData.top_predictions[0].probability * 100).toFixed(2))
-        saveFormData.append('enfermedad_codigo_2', predictionData.top_predictions[1].disease)
-        saveFormData.append('probabilidad_2', (predictionData.top_predictions[1].probability * 100).toFixed(2))
-        saveFormData.append('enfermedad_codigo_3', predictionData.top_predictions[2].disease)
-        saveFormData.append('probabilidad_3', (predictionData.top_predictions[2].probability * 100).toFixed(2))
-        
-        saveFormData.append('id_usuario', userId)
-        
-        const saveResponse = await fetch('/api/save-analysis', {
-          method: 'POST',
-          body: saveFormData
-        })
+      // Enviar TOP 3 enfermedades con probabilidades (ya como porcentajes 0-100)
+      saveFormData.append('enfermedad_codigo_1', predictionData.top_predictions[0].disease)
+      saveFormData.append('probabilidad_1', (predictionData.top_predictions[0].probability * 100).toFixed(2))
+      saveFormData.append('enfermedad_codigo_2', predictionData.top_predictions[1].disease)
+      saveFormData.append('probabilidad_2', (predictionData.top_predictions[1].probability * 100).toFixed(2))
+      saveFormData.append('enfermedad_codigo_3', predictionData.top_predictions[2].disease)
+      saveFormData.append('probabilidad_3', (predictionData.top_predictions[2].probability * 100).toFixed(2))
+      
+      const saveResponse = await authFetch('/api/save-analysis', {
+        method: 'POST',
+        body: saveFormData
+      })
+      
+      if (saveResponse.ok) {
+        const saveData = await saveResponse.json()
+        console.log('Analysis saved to database:', saveData)
         
-        if (saveResponse.ok) {
-          const saveData = await saveResponse.json()
-          console.log('Analysis saved to database:', saveData)
+        // Actualizar historial con datos de la BD
+        if (saveData.history && saveData.history.length > 0) {
+          const formattedHistory = saveData.history.map(record => ({
+            id: record.id,
+            date: record.fecha,
+            time: record.hora,
+            nombre: formData.nombre,
+            age: record.edad,
+            sex: SEX_LABELS[formData.sex.toLowerCase()] || formData.sex,
+            location: record.zona_clinica,
+            usuario: record.usuario,
+            result: `${record.top3[0].nombre} (${record.top3[0].enfermedad})`,
+            probability: record.top3[0].probabilidad,
+            status: 'completed',
+            top3: record.top3.map(item => ({
+              class: item.enfermedad,
+              name: item.nombre,
+              prob: item.probabilidad,
+              status: item.status
+            })),
+            isNew: record.id === saveData.data.historia_clinica_id
+          }))
           
-          // Actualizar historial con datos de la BD
-          if (saveData.history && saveData.history.length > 0) {
-            const formattedHistory = saveData.history.map(record => ({
-              id: record.id,
-              date: record.fecha,
-              time: record.hora,
-              nombre: formData.nombre,
-              age: record.edad,
-              sex: SEX_LABELS[formData.sex.toLowerCase()] || formData.sex,
-              location: record.zona_clinica,
-              usuario: record.usuario,
-              result: `${record.top3[0].nombre} (${record.top3[0].enfermedad})`,
-              probability: record.top3[0].probabilidad,
-              status: 'completed',
-              top3: record.top3.map(item => ({
-                class: item.enfermedad,
-                name: item.nombre,
-                prob: item.probabilidad,
-                status: item.status
-              })),
-              isNew: record.id === saveData.data.historia_clinica_id
-            }))
-            
-            setHistoryData(formattedHistory)
-            setLatestAnalysisId(saveData.data.historia_clinica_id)
-          }
-        } else {
-          console.error('Failed to save analysis to database')
+          setHistoryData(formattedHistory)
+          setLatestAnalysisId(saveData.data.historia_clinica_id)
         }
+      } else {
+        console.error('Failed to save analysis to database')
+        alert('El análisis se realizó pero no se pudo guardar en el historial.')
       }
       
       setAnalyzing(false)
@@ -903,7 +902,9 @@ const Analizar = () => {
     } catch (error) {
       console.error('Error al analizar:', error)
       setAnalyzing(false)
-      alert('Error al realizar el análisis. Por favor, intenta de nuevo.')
+      if (error.message !== SESSION_EXPIRED) {
+        alert('Error al realizar el análisis. Por favor, intenta de nuevo.')
+      }
     }
   }, [formData, preview])
 
@@ -1001,6 +1002,17 @@ const Analizar = () => {
 
         {currentStep === 2 && (
           <div className="max-w-5xl mx-auto space-y-4">
+            {reusedResult && (
+              <div
+                className={`
+                  rounded-xl p-4 border text-sm font-semibold
+                  ${theme === 'dark' ? 'bg-amber-900/30 border-amber-700 text-amber-200' : 'bg-amber-50 border-amber-300 text-amber-800'}
+                `}
+              >
+                Esta imagen es casi idéntica a una analizada recientemente para este paciente; se reutilizó ese resultado en lugar de ejecutar el modelo de nuevo.
+              </div>
+            )}
+
             {/* History Section - Results Step */}
             <HistorySection historyData={historyData} latestAnalysisId={latestAnalysisId} />
 
@@ -1,5 +1,6 @@
 import { useState, useEffect, useRef } from 'react'
 import { useTheme } from '../contexts/ThemeContext'
+import { authFetch, getSessionToken } from '../utils/session'
 
 const Buscar = () => {
   const { theme } = useTheme()
@@ -35,13 +36,12 @@ const Buscar = () => {
       }
 
       try {
-        const userId = localStorage.getItem('userId')
-        if (!userId) {
-          setError('No se encontró el ID de usuario')
+        if (!getSessionToken()) {
+          setError('Sesión no encontrada, vuelva a iniciar sesión')
           return
         }
 
-        const response = await fetch(`/api/search-patients?ci=${searchQuery}&user_id=${userId}`)
+        const response = await authFetch(`/api/search-patients?ci=${searchQuery}`)
         const data = await response.json()
 
         if (data.success) {
@@ -69,7 +69,7 @@ const Buscar = () => {
       // Extraer solo el CI sin complemento para la búsqueda
       const ciOnly = ci.split('-')[0]
       
-      const response = await fetch(`/api/patient-history/${ciOnly}`)
+      const response = await authFetch(`/api/patient-history/${ciOnly}`)
       const data = await response.json()
 
       if (data.success && data.patient) {
@@ -45,6 +45,7 @@ const Login = () => {
         localStorage.setItem('isAuthenticated', 'true')
         localStorage.setItem('username', data.user.username)
         localStorage.setItem('userId', data.user.id)
+        localStorage.setItem('sessionToken', data.token)
         navigate('/')
       } else {
         setError(data.message || 'Usuario o contraseña incorrectos')
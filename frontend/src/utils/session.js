@@ -0,0 +1,22 @@
+export const SESSION_EXPIRED = 'Sesión expirada'
+
+export const getSessionToken = () => localStorage.getItem('sessionToken')
+
+export const authHeaders = () => ({ Authorization: `Bearer ${getSessionToken()}` })
+
+export const expireSession = () => {
+  localStorage.clear()
+  window.location.replace('/login')
+}
+
+export const authFetch = async (url, options = {}) => {
+  const response = await fetch(url, {
+    ...options,
+    headers: { ...options.headers, ...authHeaders() }
+  })
+  if (response.status === 401) {
+    expireSession()
+    throw new Error(SESSION_EXPIRED)
+  }
+  return response
+}
@@ -94,9 +94,12 @@ INSERT INTO enfermedad (enfermedad, detalle) VALUES
 ON CONFLICT DO NOTHING;
 
 -- Crear índices para mejorar el rendimiento
+-- Índice funcional para el login sin distinguir mayúsculas: LOWER(nombre) = LOWER(%s)
+CREATE INDEX IF NOT EXISTS idx_usuario_nombre_lower ON usuario(LOWER(nombre));
 CREATE INDEX IF NOT EXISTS idx_paciente_ci ON paciente(ci);
 CREATE INDEX IF NOT EXISTS idx_historia_paciente ON historia_clinica(paciente_id);
 CREATE INDEX IF NOT EXISTS idx_historia_fecha ON historia_clinica(fecha);
+CREATE INDEX IF NOT EXISTS idx_historia_usuario_fecha ON historia_clinica(id_usuario, fecha);
 
 -- ============================================
 -- DATOS DE PRUEBA PARA TESTING